@@ -2,14 +2,26 @@
 """
 Benchmark script for testing feature store retrieval latency
 """
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import httpx
+import numpy as np
 import requests
+from requests.adapters import HTTPAdapter
 import time
-import statistics
 from typing import List
 
 
 BASE_URL = "http://localhost:8000"
 
+# Shared session so every request reuses pooled keep-alive connections
+SESSION = requests.Session()
+SESSION.mount("http://", HTTPAdapter(pool_connections=32, pool_maxsize=64))
+SESSION.headers.update({"Connection": "keep-alive"})
+
+# Number of in-flight requests the ingest setup and retrieval benchmarks keep open
+CONCURRENCY = 32
+
 
 def register_test_features():
     """Register test features"""
@@ -43,7 +55,7 @@ def register_test_features():
 
     for feature in features:
         try:
-            response = requests.post(f"{BASE_URL}/register", json=feature)
+            response = SESSION.post(f"{BASE_URL}/register", json=feature)
             if response.status_code == 200:
                 print(f"  Registered: {feature['name']}")
             else:
@@ -52,10 +64,11 @@ def register_test_features():
             print(f"  Error registering {feature['name']}: {e}")
 
 
-def ingest_test_data(num_entities: int = 1000):
+def ingest_test_data(num_entities: int = 1000, concurrency: int = CONCURRENCY):
     """Ingest test data for multiple entities"""
-    print(f"\nIngesting test data for {num_entities} entities...")
-    for i in range(num_entities):
+    print(f"\nIngesting test data for {num_entities} entities (concurrency={concurrency})...")
+
+    def ingest_entity(i: int):
         entity_id = f"user_{i}"
         data = {
             "entity_id": entity_id,
@@ -67,90 +80,131 @@ def ingest_test_data(num_entities: int = 1000):
             ]
         }
         try:
-            response = requests.post(f"{BASE_URL}/features/ingest", json=data)
+            response = SESSION.post(f"{BASE_URL}/features/ingest", json=data)
             if response.status_code != 200:
                 print(f"  Failed to ingest for {entity_id}")
         except Exception as e:
             print(f"  Error ingesting for {entity_id}: {e}")
+
+    # Requests share SESSION's connection pool, which is sized above the worker count
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(ingest_entity, range(num_entities)))
+
     print(f"  Ingested data for {num_entities} entities")
 
 
-def benchmark_single_entity_retrieval(num_requests: int = 1000) -> List[float]:
+async def benchmark_single_entity_retrieval(
+    client: httpx.AsyncClient,
+    num_requests: int = 1000,
+    concurrency: int = CONCURRENCY,
+) -> List[float]:
     """Benchmark single entity feature retrieval"""
-    print(f"\nBenchmarking single entity retrieval ({num_requests} requests)...")
+    print(f"\nBenchmarking single entity retrieval ({num_requests} requests, concurrency={concurrency})...")
 
     latencies = []
 
-    for i in range(num_requests):
-        entity_id = f"user_{i % 1000}"
-        start_time = time.perf_counter()
-        try:
-            response = requests.get(
-                f"{BASE_URL}/features/online/{entity_id}",
-                params={"feature_names": "user_age,user_clicks_30d,user_purchases_7d,user_avg_session_time"}
-            )
-            end_time = time.perf_counter()
-
-            if response.status_code == 200:
-                latency_ms = (end_time - start_time) * 1000
-                latencies.append(latency_ms)
-        except Exception as e:
-            print(f"  ✗ Error in request {i}: {e}")
+    async def worker(worker_id: int):
+        for i in range(worker_id, num_requests, concurrency):
+            entity_id = f"user_{i % 1000}"
+            start_time = time.perf_counter()
+            try:
+                response = await client.get(
+                    f"/features/online/{entity_id}",
+                    params={"feature_names": "user_age,user_clicks_30d,user_purchases_7d,user_avg_session_time"}
+                )
+                end_time = time.perf_counter()
+
+                if response.status_code == 200:
+                    latency_ms = (end_time - start_time) * 1000
+                    latencies.append(latency_ms)
+            except Exception as e:
+                print(f"  ✗ Error in request {i}: {e}")
+
+    await asyncio.gather(*(worker(worker_id) for worker_id in range(concurrency)))
 
     return latencies
 
 
-def benchmark_batch_retrieval(num_requests: int = 100, batch_size: int = 10) -> List[float]:
+async def benchmark_batch_retrieval(
+    client: httpx.AsyncClient,
+    num_requests: int = 100,
+    batch_size: int = 10,
+    concurrency: int = CONCURRENCY,
+) -> List[float]:
     """Benchmark batch feature retrieval"""
-    print(f"\nBenchmarking batch retrieval ({num_requests} requests, batch size={batch_size})...")
+    print(f"\nBenchmarking batch retrieval ({num_requests} requests, batch size={batch_size}, "
+          f"concurrency={concurrency})...")
 
     latencies = []
     feature_names = ["user_age", "user_clicks_30d", "user_purchases_7d", "user_avg_session_time"]
 
-    for i in range(num_requests):
-        entity_ids = [f"user_{(i * batch_size + j) % 1000}" for j in range(batch_size)]
-        data = {
-            "entity_ids": entity_ids,
-            "feature_names": feature_names
-        }
+    async def worker(worker_id: int):
+        for i in range(worker_id, num_requests, concurrency):
+            entity_ids = [f"user_{(i * batch_size + j) % 1000}" for j in range(batch_size)]
+            data = {
+                "entity_ids": entity_ids,
+                "feature_names": feature_names
+            }
 
-        start_time = time.perf_counter()
-        try:
-            response = requests.post(f"{BASE_URL}/features/online", json=data)
-            end_time = time.perf_counter()
+            start_time = time.perf_counter()
+            try:
+                response = await client.post("/features/online", json=data)
+                end_time = time.perf_counter()
 
-            if response.status_code == 200:
-                latency_ms = (end_time - start_time) * 1000
-                latencies.append(latency_ms)
-        except Exception as e:
-            print(f"  ✗ Error in request {i}: {e}")
+                if response.status_code == 200:
+                    latency_ms = (end_time - start_time) * 1000
+                    latencies.append(latency_ms)
+            except Exception as e:
+                print(f"  ✗ Error in request {i}: {e}")
+
+    await asyncio.gather(*(worker(worker_id) for worker_id in range(concurrency)))
 
     return latencies
 
 
+async def run_retrieval_benchmarks():
+    """Run the retrieval benchmarks over one shared HTTP/2-capable client"""
+    async with httpx.AsyncClient(
+        http2=True,
+        base_url=BASE_URL,
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+    ) as client:
+        # Benchmark single entity retrieval
+        single_latencies = await benchmark_single_entity_retrieval(client, num_requests=1000)
+        print_statistics(single_latencies, "Single Entity Retrieval")
+
+        # Benchmark batch retrieval
+        batch_latencies = await benchmark_batch_retrieval(client, num_requests=100, batch_size=10)
+        print_statistics(batch_latencies, "Batch Retrieval (10 entities)")
+
+        # Test with larger batch
+        large_batch_latencies = await benchmark_batch_retrieval(client, num_requests=100, batch_size=50)
+        print_statistics(large_batch_latencies, "Batch Retrieval (50 entities)")
+
+
 def print_statistics(latencies: List[float], test_name: str):
     """Print latency statistics"""
     if not latencies:
         print(f"\n{test_name}: No successful requests")
         return
 
-    sorted_latencies = sorted(latencies)
+    latencies_ms = np.asarray(latencies, dtype=np.float64)
+    p50_latency, p95_latency, p99_latency = np.percentile(latencies_ms, [50, 95, 99])
 
     print(f"\n{'='*60}")
     print(f"{test_name} Results")
     print(f"{'='*60}")
-    print(f"Total Requests:    {len(latencies)}")
-    print(f"Min Latency:       {min(latencies):.2f} ms")
-    print(f"Max Latency:       {max(latencies):.2f} ms")
-    print(f"Mean Latency:      {statistics.mean(latencies):.2f} ms")
-    print(f"Median Latency:    {statistics.median(latencies):.2f} ms")
-    print(f"P50 Latency:       {sorted_latencies[int(len(sorted_latencies) * 0.50)]:.2f} ms")
-    print(f"P95 Latency:       {sorted_latencies[int(len(sorted_latencies) * 0.95)]:.2f} ms")
-    print(f"P99 Latency:       {sorted_latencies[int(len(sorted_latencies) * 0.99)]:.2f} ms")
-    print(f"Std Deviation:     {statistics.stdev(latencies):.2f} ms")
+    print(f"Total Requests:    {latencies_ms.size}")
+    print(f"Min Latency:       {latencies_ms.min():.2f} ms")
+    print(f"Max Latency:       {latencies_ms.max():.2f} ms")
+    print(f"Mean Latency:      {latencies_ms.mean():.2f} ms")
+    print(f"Median Latency:    {p50_latency:.2f} ms")
+    print(f"P50 Latency:       {p50_latency:.2f} ms")
+    print(f"P95 Latency:       {p95_latency:.2f} ms")
+    print(f"P99 Latency:       {p99_latency:.2f} ms")
+    print(f"Std Deviation:     {latencies_ms.std(ddof=1):.2f} ms")
 
     # Check if under 10ms
-    p95_latency = sorted_latencies[int(len(sorted_latencies) * 0.95)]
     if p95_latency < 10:
         print(f"\n SUCCESS: P95 latency is under 10ms ({p95_latency:.2f} ms)")
     else:
@@ -171,17 +225,8 @@ def main():
         # Step 2: Ingest test data
         ingest_test_data(num_entities=1000)
 
-        # Step 3: Benchmark single entity retrieval
-        single_latencies = benchmark_single_entity_retrieval(num_requests=1000)
-        print_statistics(single_latencies, "Single Entity Retrieval")
-
-        # Step 4: Benchmark batch retrieval
-        batch_latencies = benchmark_batch_retrieval(num_requests=100, batch_size=10)
-        print_statistics(batch_latencies, "Batch Retrieval (10 entities)")
-
-        # Step 5: Test with larger batch
-        large_batch_latencies = benchmark_batch_retrieval(num_requests=100, batch_size=50)
-        print_statistics(large_batch_latencies, "Batch Retrieval (50 entities)")
+        # Step 3: Benchmark single entity and batch retrieval
+        asyncio.run(run_retrieval_benchmarks())
 
     except KeyboardInterrupt:
         print("\n\nBenchmark interrupted by user")
@@ -1,16 +1,144 @@
-from typing import List
-import json
+from typing import Any, Dict, List, Optional, Union
+from threading import Lock
 
+from cachetools import TTLCache
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import ORJSONResponse
+import numpy as np
+import orjson
+from sqlalchemy import Row, select
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
-from src.database import get_session_context
+from src.database import engine, get_session_context
 from src.models import FeatureDefinition
-from src.redis_client import get_redis_client
+from src.online_store import get_online_store
 from src.schemas import IngestRequest, OnlineFeatureRequest, OnlineFeatureResponse
 
 router = APIRouter()
 
+# In-process cache of feature definitions, keyed by feature name
+_feature_def_cache: TTLCache = TTLCache(maxsize=10_000, ttl=60)
+_feature_def_cache_lock = Lock()
+
+# Cached in place of a definition for names that are not registered
+_NOT_REGISTERED = object()
+
+# Types stored in a native encoding rather than JSON
+_NATIVE_TYPES = {"int", "float", "boolean", "embedding"}
+
+# Range of int feature values (orjson only serializes signed 64-bit integers)
+_INT64_MIN, _INT64_MAX = -(2 ** 63), 2 ** 63 - 1
+
+
+def _invalidate_feature_def(feature_name: str):
+    """Drop a feature definition from the in-process cache"""
+    with _feature_def_cache_lock:
+        _feature_def_cache.pop(feature_name, None)
+
+
+def _query_feature_defs(feature_names: List[str]) -> List[Row]:
+    """Load the serving-relevant columns of feature definitions by name from the database"""
+    with Session(engine) as session:
+        return session.execute(
+            select(
+                FeatureDefinition.name,
+                FeatureDefinition.ttl_seconds,
+                FeatureDefinition.data_type,
+            ).where(FeatureDefinition.name.in_(feature_names))
+        ).all()
+
+
+async def _get_feature_defs(
+    feature_names: List[str],
+    recheck_unregistered: bool = False,
+) -> Dict[str, Row]:
+    """
+    Get feature definitions by name, hitting the database only for cache misses.
+    Names that are not registered are left out of the result; with
+    recheck_unregistered, names cached as unregistered are looked up again.
+    """
+    feature_defs = {}
+    missing_names = []
+    with _feature_def_cache_lock:
+        for feature_name in feature_names:
+            feature_def = _feature_def_cache.get(feature_name)
+            if feature_def is None or (feature_def is _NOT_REGISTERED and recheck_unregistered):
+                missing_names.append(feature_name)
+            elif feature_def is not _NOT_REGISTERED:
+                feature_defs[feature_name] = feature_def
+
+    if missing_names:
+        # Keep the blocking database call off the event loop
+        fetched_defs = await run_in_threadpool(_query_feature_defs, missing_names)
+        with _feature_def_cache_lock:
+            for feature_def in fetched_defs:
+                _feature_def_cache[feature_def.name] = feature_def
+                feature_defs[feature_def.name] = feature_def
+            # Remember unregistered names too, so repeated lookups skip the database
+            for feature_name in missing_names:
+                if feature_name not in feature_defs:
+                    _feature_def_cache[feature_name] = _NOT_REGISTERED
+
+    return feature_defs
+
+
+def _encode_value(data_type: str, value: Any) -> Union[str, bytes]:
+    """
+    Serialize a feature value for the online store: scalars as plain strings,
+    embeddings as packed little-endian float32, anything else as JSON
+    """
+    if data_type not in _NATIVE_TYPES:
+        return orjson.dumps(value)
+    if value is None:
+        return ""
+    if data_type == "embedding":
+        vector = np.asarray(value, dtype="<f4")
+        if vector.ndim != 1 or vector.size == 0:
+            raise ValueError("Embedding must be a non-empty flat list of numbers")
+        return vector.tobytes()
+    if isinstance(value, bool):
+        if data_type != "boolean":
+            raise ValueError(f"Boolean is not a valid {data_type}")
+        return "true" if value else "false"
+    if data_type == "boolean":
+        if value in ("true", "false"):
+            return value
+        raise ValueError("Boolean must be true or false")
+    if data_type == "int":
+        if isinstance(value, float) and not value.is_integer():
+            raise ValueError("Int must not have a fractional part")
+        int_value = int(value)
+        # Keep ints within what the JSON responses can serialize
+        if not _INT64_MIN <= int_value <= _INT64_MAX:
+            raise ValueError("Int must fit in a signed 64-bit integer")
+        return str(int_value)
+    return str(float(value))
+
+
+def _decode_value(data_type: Optional[str], value: Optional[bytes]) -> Any:
+    """
+    Deserialize a raw feature value read from the online store.
+
+    Values that do not match the expected encoding (e.g. written under a since
+    deleted or re-typed definition) are served as None rather than failing.
+    """
+    if not value:
+        return None
+    try:
+        if data_type == "int":
+            return int(value)
+        if data_type == "float":
+            return float(value)
+        if data_type == "boolean":
+            return value == b"true"
+        if data_type == "embedding":
+            # Returned as an array so ORJSONResponse writes float32 values in their short form
+            return np.frombuffer(value, dtype="<f4")
+        return orjson.loads(value)
+    except ValueError:
+        return None
+
 
 @router.post("/register")
 def register_feature(
@@ -23,6 +151,7 @@ def register_feature(
 
     session.add(feature)
     session.commit()
+    _invalidate_feature_def(feature.name)
     return {"message": "Feature registered"}
 
 
@@ -48,45 +177,51 @@ def delete_feature(
 
     session.delete(feature)
     session.commit()
+    _invalidate_feature_def(feature.name)
     return {"message": f"Feature '{feature.name}' deleted successfully"}
 
 
 @router.post("/features/ingest")
-def ingest_features(
-    request: IngestRequest,
-    session: Session = Depends(get_session_context)
-):
-    """Ingest feature values into Redis for online serving"""
-    redis_client = get_redis_client()
+async def ingest_features(request: IngestRequest):
+    """Ingest feature values into the online store for serving"""
+    online_store = get_online_store()
 
-    ingested_features = []
+    # Look up feature definitions (for TTLs and data types). Names cached as
+    # unregistered are rechecked, as another worker may have registered them since.
+    feature_names = [feature_value.feature_name for feature_value in request.features]
+    feature_defs = await _get_feature_defs(feature_names, recheck_unregistered=True)
 
-    for feature_value in request.features:
-        # Look up feature definition to get TTL
-        feature_def = session.query(FeatureDefinition).filter(
-            FeatureDefinition.name == feature_value.feature_name
-        ).first()
-
-        if not feature_def:
+    for feature_name in feature_names:
+        if feature_name not in feature_defs:
             raise HTTPException(
                 status_code=404,
-                detail=f"Feature '{feature_value.feature_name}' not registered"
+                detail=f"Feature '{feature_name}' not registered"
             )
 
-        # Redis key format: entity_id:feature_name
-        redis_key = f"{request.entity_id}:{feature_value.feature_name}"
+    ingested_features = []
+    feature_mapping = {}
+    feature_ttls = {}
+
+    for feature_value in request.features:
+        feature_def = feature_defs[feature_value.feature_name]
 
-        # Serialize value to JSON
-        value_json = json.dumps(feature_value.value)
+        try:
+            feature_mapping[feature_value.feature_name] = _encode_value(
+                feature_def.data_type, feature_value.value
+            )
+        except (TypeError, ValueError, OverflowError):
+            raise HTTPException(
+                status_code=422,
+                detail=f"Invalid value for feature '{feature_value.feature_name}' "
+                       f"of type '{feature_def.data_type}'"
+            )
 
-        # Set value in Redis with TTL if specified
-        if feature_def.ttl_seconds:
-            redis_client.setex(redis_key, feature_def.ttl_seconds, value_json)
-        else:
-            redis_client.set(redis_key, value_json)
+        feature_ttls[feature_value.feature_name] = feature_def.ttl_seconds
 
         ingested_features.append(feature_value.feature_name)
 
+    await online_store.set_features(request.entity_id, feature_mapping, feature_ttls)
+
     return {
         "message": "Features ingested successfully",
         "entity_id": request.entity_id,
@@ -95,62 +230,65 @@ def ingest_features(
 
 
 @router.post("/features/online", response_model=List[OnlineFeatureResponse])
-def get_online_features(request: OnlineFeatureRequest):
-    """Retrieve online features for multiple entities"""
-    redis_client = get_redis_client()
+async def get_online_features(request: OnlineFeatureRequest):
+    """Retrieve online features for multiple entities in a single store round-trip"""
+    online_store = get_online_store()
 
-    results = []
+    values = await online_store.get_features_batch(request.entity_ids, request.feature_names)
 
-    for entity_id in request.entity_ids:
-        features_dict = {}
+    feature_defs = await _get_feature_defs(request.feature_names)
+    data_types = [
+        feature_defs[feature_name].data_type if feature_name in feature_defs else None
+        for feature_name in request.feature_names
+    ]
 
-        for feature_name in request.feature_names:
-            redis_key = f"{entity_id}:{feature_name}"
-            value = redis_client.get(redis_key)
+    results = []
 
-            if value:
-                # Deserialize from JSON
-                features_dict[feature_name] = json.loads(value)
-            else:
-                features_dict[feature_name] = None
+    for i, entity_id in enumerate(request.entity_ids):
+        features_dict = {
+            feature_name: _decode_value(data_type, value)
+            for feature_name, data_type, value
+            in zip(request.feature_names, data_types, values[i])
+        }
 
-        results.append(OnlineFeatureResponse(
-            entity_id=entity_id,
-            features=features_dict
-        ))
+        results.append({
+            "entity_id": entity_id,
+            "features": features_dict
+        })
 
-    return results
+    # Serialize directly with orjson; response_model only documents the shape
+    return ORJSONResponse(results)
 
 
 @router.get("/features/online/{entity_id}")
-def get_entity_features(
+async def get_entity_features(
     entity_id: str,
     feature_names: str = None  # Comma-separated feature names
 ):
     """Retrieve all or specific features for a single entity"""
-    redis_client = get_redis_client()
+    online_store = get_online_store()
 
     # If feature_names provided, parse them
     if feature_names:
         requested_features = [f.strip() for f in feature_names.split(",")]
+        values = await online_store.get_features(entity_id, requested_features)
+        stored_features = list(zip(requested_features, values))
     else:
-        # Get all keys for this entity
-        pattern = f"{entity_id}:*"
-        keys = redis_client.keys(pattern)
-        requested_features = [key.split(":", 1)[1] for key in keys]
+        # Get all features stored for this entity
+        stored_features = list((await online_store.get_all_features(entity_id)).items())
 
-    features_dict = {}
-    for feature_name in requested_features:
-        redis_key = f"{entity_id}:{feature_name}"
-        value = redis_client.get(redis_key)
+    feature_defs = await _get_feature_defs([feature_name for feature_name, _ in stored_features])
 
-        if value:
-            features_dict[feature_name] = json.loads(value)
-        else:
-            features_dict[feature_name] = None
+    features_dict = {
+        feature_name: _decode_value(
+            feature_defs[feature_name].data_type if feature_name in feature_defs else None,
+            value
+        )
+        for feature_name, value in stored_features
+    }
 
-    return {
+    return ORJSONResponse({
         "entity_id": entity_id,
         "features": features_dict
-    }
+    })
 
@@ -9,9 +9,10 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 
 engine = create_engine(
     DATABASE_URL,
-    echo=True,
-    pool_size=10,
-    max_overflow=20,
+    echo=os.getenv("SQL_ECHO") == "1",  # SQL logging is opt-in; it is costly on hot paths
+    pool_pre_ping=True,
+    pool_size=20,
+    max_overflow=40,
 )
 
 @retry(
@@ -1,21 +1,25 @@
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.routing import APIRoute
 
 from src.api.router import router
 from src.database import init_db
+from src.online_store import init_online_store, close_online_store
 from src.redis_client import get_redis_client, close_redis_client
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup: Initialize database and Redis
+    # Startup: Initialize database, Redis and the online store
     init_db()
     get_redis_client()  # Initialize Redis connection
+    await init_online_store()
     yield
     # Shutdown: Cleanup
-    close_redis_client()
+    await close_online_store()
+    await close_redis_client()
 
 
 app = FastAPI(
@@ -23,6 +27,7 @@ app = FastAPI(
     openapi_url="/openapi.json",
     docs_url="/docs",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 app.include_router(router)
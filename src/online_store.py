@@ -0,0 +1,302 @@
+import asyncio
+import logging
+import os
+import time
+from abc import ABC, abstractmethod
+from threading import Lock
+from typing import Dict, List, Optional, Tuple, Union
+
+from src.redis_client import get_redis_client
+
+# "redis" (default) or "memory" for the co-located in-process store
+ONLINE_STORE_BACKEND = os.getenv("ONLINE_STORE_BACKEND", "redis")
+
+# Seconds between sweeps of expired entries in the in-process store
+MEMORY_STORE_SWEEP_INTERVAL = int(os.getenv("MEMORY_STORE_SWEEP_INTERVAL", "60"))
+
+logger = logging.getLogger(__name__)
+
+# Global online store instance
+_online_store: Optional["OnlineStore"] = None
+
+
+def _entity_key(entity_id: str) -> bytes:
+    """Redis key of the hash holding all features of an entity"""
+    return b"entity:" + entity_id.encode()
+
+
+class OnlineStore(ABC):
+    """Storage backend for online feature values, keyed by entity and feature name"""
+
+    async def load(self):
+        """Prepare the store for serving"""
+
+    async def close(self):
+        """Release any resources held by the store"""
+
+    @abstractmethod
+    async def set_features(
+        self,
+        entity_id: str,
+        values: Dict[str, Union[str, bytes]],
+        ttls: Dict[str, Optional[int]],
+    ):
+        """Store feature values for an entity, each expiring after its TTL (None = never)"""
+
+    @abstractmethod
+    async def get_features(self, entity_id: str, feature_names: List[str]) -> List[Optional[bytes]]:
+        """Get raw values of the given features for one entity (None if missing)"""
+
+    @abstractmethod
+    async def get_features_batch(
+        self,
+        entity_ids: List[str],
+        feature_names: List[str],
+    ) -> List[List[Optional[bytes]]]:
+        """Get raw values of the given features for many entities"""
+
+    @abstractmethod
+    async def get_all_features(self, entity_id: str) -> Dict[str, bytes]:
+        """Get raw values of every feature stored for one entity"""
+
+
+class RedisOnlineStore(OnlineStore):
+    """Online store backed by Redis, one hash per entity"""
+
+    async def set_features(self, entity_id, values, ttls):
+        if not values:
+            return
+
+        redis_key = _entity_key(entity_id)
+
+        # Group fields by TTL so each group expires with a single HEXPIRE
+        fields_by_ttl = {}
+        for feature_name, ttl_seconds in ttls.items():
+            fields_by_ttl.setdefault(ttl_seconds, []).append(feature_name)
+
+        # Queue all writes and flush them to Redis in one round-trip
+        pipe = get_redis_client().pipeline(transaction=False)
+        pipe.hset(redis_key, mapping=values)
+
+        # Set per-field TTL if specified; clear any previous TTL otherwise
+        for ttl_seconds, fields in fields_by_ttl.items():
+            if ttl_seconds:
+                pipe.hexpire(redis_key, ttl_seconds, *fields)
+            else:
+                pipe.hpersist(redis_key, *fields)
+
+        await pipe.execute()
+
+    async def get_features(self, entity_id, feature_names):
+        if not feature_names:
+            return []
+        return await get_redis_client().hmget(_entity_key(entity_id), feature_names)
+
+    async def get_features_batch(self, entity_ids, feature_names):
+        if not feature_names:
+            return [[] for _ in entity_ids]
+
+        # Encode field names once per request rather than once per entity
+        feature_fields = [feature_name.encode() for feature_name in feature_names]
+
+        # Fetch every entity's hash fields in a single pipelined round-trip
+        pipe = get_redis_client().pipeline(transaction=False)
+        for entity_id in entity_ids:
+            pipe.hmget(_entity_key(entity_id), feature_fields)
+        return await pipe.execute()
+
+    async def get_all_features(self, entity_id):
+        stored = await get_redis_client().hgetall(_entity_key(entity_id))
+        return {feature_name.decode(): value for feature_name, value in stored.items()}
+
+
+class InMemoryOnlineStore(OnlineStore):
+    """
+    Co-located online store serving reads from an in-process dict.
+
+    The dict is loaded from Redis at startup and every write goes through to
+    Redis for durability. Writes are only visible to the process that made them,
+    so this backend is meant for single-worker, single-node deployments.
+    """
+
+    def __init__(self, durable_store: OnlineStore):
+        self._durable_store = durable_store
+        # entity_id -> feature_name -> (value, expiry as unix time or None)
+        self._entities: Dict[str, Dict[str, Tuple[bytes, Optional[float]]]] = {}
+        self._lock = Lock()
+        self._sweep_task: Optional[asyncio.Task] = None
+
+    async def load(self):
+        """Populate the dict from every entity hash currently stored in Redis"""
+        redis_client = get_redis_client()
+        entities = {}
+
+        cursor = 0
+        while True:
+            cursor, redis_keys = await redis_client.scan(cursor, match=b"entity:*", count=1000)
+
+            if redis_keys:
+                # Read each SCAN batch with two pipelined round-trips: values, then field TTLs
+                pipe = redis_client.pipeline(transaction=False)
+                for redis_key in redis_keys:
+                    pipe.hgetall(redis_key)
+                stored_hashes = [
+                    (redis_key, stored)
+                    for redis_key, stored in zip(redis_keys, await pipe.execute())
+                    if stored
+                ]
+
+                pipe = redis_client.pipeline(transaction=False)
+                for redis_key, stored in stored_hashes:
+                    pipe.hpexpiretime(redis_key, *stored)
+                expire_times_per_key = await pipe.execute()
+
+                for (redis_key, stored), expire_times in zip(stored_hashes, expire_times_per_key):
+                    features = {}
+                    for (feature_name, value), expire_time in zip(stored.items(), expire_times):
+                        # HPEXPIRETIME is -1 for fields without a TTL and -2 for fields gone since
+                        if expire_time == -2:
+                            continue
+                        expires_at = expire_time / 1000 if expire_time > 0 else None
+                        features[feature_name.decode()] = (value, expires_at)
+                    entities[redis_key[len(b"entity:"):].decode()] = features
+
+            if cursor == 0:
+                break
+
+        with self._lock:
+            self._entities = entities
+
+        if self._sweep_task is None:
+            self._sweep_task = asyncio.create_task(self._sweep_periodically())
+
+    async def close(self):
+        if self._sweep_task is not None:
+            self._sweep_task.cancel()
+            self._sweep_task = None
+
+    @staticmethod
+    def _prune_expired(features: Dict[str, Tuple[bytes, Optional[float]]], now: float):
+        """Drop expired fields of one entity; caller must hold the lock"""
+        expired = [
+            feature_name
+            for feature_name, (_, expires_at) in features.items()
+            if expires_at is not None and expires_at <= now
+        ]
+        for feature_name in expired:
+            del features[feature_name]
+
+    def _sweep_expired(self):
+        """Drop expired fields, and entities left empty, from the whole store"""
+        now = time.time()
+        with self._lock:
+            for entity_id in list(self._entities):
+                features = self._entities[entity_id]
+                self._prune_expired(features, now)
+                if not features:
+                    del self._entities[entity_id]
+
+    async def _sweep_periodically(self):
+        """Reclaim entries that expire without being read or rewritten"""
+        while True:
+            await asyncio.sleep(MEMORY_STORE_SWEEP_INTERVAL)
+            self._sweep_expired()
+
+    async def set_features(self, entity_id, values, ttls):
+        await self._durable_store.set_features(entity_id, values, ttls)
+
+        now = time.time()
+        with self._lock:
+            features = self._entities.setdefault(entity_id, {})
+            self._prune_expired(features, now)
+            for feature_name, value in values.items():
+                ttl_seconds = ttls.get(feature_name)
+                features[feature_name] = (
+                    value if isinstance(value, bytes) else value.encode(),
+                    now + ttl_seconds if ttl_seconds else None,
+                )
+
+    def _lookup(self, entity_id: str, feature_names: List[str], now: float) -> List[Optional[bytes]]:
+        """Read live values for one entity; caller must hold the lock"""
+        features = self._entities.get(entity_id)
+        if not features:
+            return [None] * len(feature_names)
+
+        values = []
+        for feature_name in feature_names:
+            stored = features.get(feature_name)
+            if stored is None:
+                values.append(None)
+            elif stored[1] is not None and stored[1] <= now:
+                # Expire lazily on read
+                del features[feature_name]
+                values.append(None)
+            else:
+                values.append(stored[0])
+        return values
+
+    async def get_features(self, entity_id, feature_names):
+        now = time.time()
+        with self._lock:
+            return self._lookup(entity_id, feature_names, now)
+
+    async def get_features_batch(self, entity_ids, feature_names):
+        now = time.time()
+        with self._lock:
+            return [self._lookup(entity_id, feature_names, now) for entity_id in entity_ids]
+
+    async def get_all_features(self, entity_id):
+        now = time.time()
+        with self._lock:
+            features = self._entities.get(entity_id, {})
+            feature_names = list(features)
+            values = self._lookup(entity_id, feature_names, now)
+        return {
+            feature_name: value
+            for feature_name, value in zip(feature_names, values)
+            if value is not None
+        }
+
+
+async def init_online_store() -> OnlineStore:
+    """Create the configured online store and load it for serving"""
+    global _online_store
+
+    if _online_store is None:
+        if ONLINE_STORE_BACKEND == "memory":
+            # Each worker would serve only its own writes, so refuse multi-worker setups
+            for workers_var in ("API_WORKERS", "WEB_CONCURRENCY"):
+                workers = os.getenv(workers_var, "")
+                if workers not in ("", "1"):
+                    raise RuntimeError(
+                        f"ONLINE_STORE_BACKEND=memory requires a single worker, "
+                        f"but {workers_var}={workers}"
+                    )
+            logger.warning(
+                "Using the in-process online store: writes are only visible to this process, "
+                "so the API must run with a single worker (API_WORKERS=1)"
+            )
+            _online_store = InMemoryOnlineStore(RedisOnlineStore())
+        elif ONLINE_STORE_BACKEND == "redis":
+            _online_store = RedisOnlineStore()
+        else:
+            raise ValueError(f"Unknown ONLINE_STORE_BACKEND '{ONLINE_STORE_BACKEND}'")
+        await _online_store.load()
+
+    return _online_store
+
+
+def get_online_store() -> OnlineStore:
+    """Get the online store initialized at startup"""
+    if _online_store is None:
+        raise RuntimeError("Online store has not been initialized")
+    return _online_store
+
+
+async def close_online_store():
+    """Release the online store"""
+    global _online_store
+
+    if _online_store is not None:
+        await _online_store.close()
+        _online_store = None
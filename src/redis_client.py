@@ -1,32 +1,71 @@
 import os
-from redis import Redis
+from urllib.parse import parse_qs, urlencode, urlparse
+from redis.asyncio import BlockingConnectionPool, Redis
 from typing import Optional
 
 REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379")
 
+# Unix socket used instead of TCP when Redis runs on the same host
+REDIS_SOCKET_PATH = os.getenv("REDIS_SOCKET_PATH", "/var/run/redis/redis.sock")
+
 # Global Redis client instance
 _redis_client: Optional[Redis] = None
 
 
+def _resolve_redis_url() -> str:
+    """Prefer the local unix socket over TCP when Redis is co-located"""
+    parsed = urlparse(REDIS_URL)
+    if (
+        parsed.scheme != "redis"
+        or parsed.hostname not in ("localhost", "127.0.0.1")
+        or not os.path.exists(REDIS_SOCKET_PATH)
+    ):
+        return REDIS_URL
+
+    # Carry credentials and the database index over to the socket URL
+    userinfo = parsed.netloc.rpartition("@")[0]
+    query = parse_qs(parsed.query)
+    db = parsed.path.lstrip("/")
+    if db and "db" not in query:
+        query["db"] = [db]
+
+    socket_url = f"unix://{userinfo + '@' if userinfo else ''}{REDIS_SOCKET_PATH}"
+    if query:
+        socket_url += "?" + urlencode(query, doseq=True)
+    return socket_url
+
+
 def get_redis_client() -> Redis:
-    """Get or create Redis client connection"""
+    """Get or create the async Redis client (backed by a shared connection pool)"""
     global _redis_client
 
     if _redis_client is None:
-        _redis_client = Redis.from_url(
-            REDIS_URL,
-            decode_responses=True,  # Automatically decode responses to strings
+        redis_url = _resolve_redis_url()
+        connection_options = {}
+        if not redis_url.startswith("unix://"):
+            connection_options["socket_keepalive"] = True  # Keep idle pooled TCP connections alive
+
+        # Blocking pool: bursts beyond max_connections wait for a free connection
+        # (up to `timeout` seconds) instead of failing immediately
+        pool = BlockingConnectionPool.from_url(
+            redis_url,
+            decode_responses=False,  # Return raw bytes; values are parsed straight from bytes
             socket_connect_timeout=5,
             socket_timeout=5,
+            max_connections=128,
+            timeout=5,
+            health_check_interval=30,
+            **connection_options,
         )
+        _redis_client = Redis(connection_pool=pool)
 
     return _redis_client
 
 
-def close_redis_client():
+async def close_redis_client():
     """Close Redis client connection"""
     global _redis_client
 
     if _redis_client is not None:
-        _redis_client.close()
+        await _redis_client.aclose(close_connection_pool=True)
         _redis_client = None
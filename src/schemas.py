@@ -1,26 +1,34 @@
 from typing import Dict, List, Any, Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 
 class FeatureValue(BaseModel):
     """Schema for a single feature value"""
+    model_config = ConfigDict(frozen=True)
+
     feature_name: str
     value: Any
 
 
 class IngestRequest(BaseModel):
     """Schema for ingesting features for an entity"""
+    model_config = ConfigDict(frozen=True)
+
     entity_id: str
     features: List[FeatureValue]
 
 
 class OnlineFeatureRequest(BaseModel):
     """Schema for retrieving features"""
+    model_config = ConfigDict(frozen=True)
+
     entity_ids: List[str]
     feature_names: List[str]
 
 
 class OnlineFeatureResponse(BaseModel):
     """Schema for online feature response"""
+    model_config = ConfigDict(frozen=True)
+
     entity_id: str
     features: Dict[str, Any]